@@ -10,19 +10,27 @@ reponses are used to determine the number of publications meeting those
 filters and the list of publications.
 """
 
+import functools
 import http.client as http_client
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from time import gmtime, mktime
+from itertools import count, repeat
+from operator import itemgetter
+from time import time_ns
 from urllib.parse import urljoin
 
+import orjson
 import requests
-from voluptuous import Invalid
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3Error
+from urllib3.util.retry import Retry
 
 from booklist.config import Configurator
 
-# pylint: disable=logging-format-interpolation
+# Fields of a publication used in filtering and in the search results;
+# fetches all three from a publication's dictionary in a single call.
+_PUBLICATION_FIELDS = itemgetter("shortAuthor", "format", "shortTitle")
 
 
 class CatalogSearchError(Exception):
@@ -45,24 +53,33 @@ class CatalogSearch:
     """Handles requests to a public library's catalog website.
 
     To perform a search on the library's catalog, two types of requests
-    are needed:  one to retrieve the total number of publications
+    are used:  one to retrieve the total number of publications
     available given a set of filters, the other to retreive publication
-    information up to 'hitsPerPage' per request.
+    information up to 'hitsPerPage' per request.  The count is only
+    requested if the first page of publications is full.
 
-    These two requests are issued for the current year and again for
+    These requests are issued for the current year and again for
     publications with no known publication date.
     """
 
     # Timeout in seconds for HTTP connect and read.
     TIMEOUT = 5
 
-    # Used for 'cache busting'; in lieu of timezone information or
-    # microsecond precision an increment is used.  See __timestamp().
-    TIMESTAMP_INCREMENT = 1
-
     # Maximum number of publications returned in a response.
     MAX_HITS_PER_PAGE = 30
 
+    # Maximum number of page requests issued concurrently for a year.
+    MAX_PAGE_WORKERS = 4
+
+    # Maximum number of connections kept open to the catalog website.  Both
+    # publication years are searched concurrently, so this allows every
+    # page request of a search to have its own connection.
+    MAX_CONNECTIONS = 2 * MAX_PAGE_WORKERS
+
+    # Number of times a request is retried when the connection fails or
+    # the server reports a transient error.
+    MAX_RETRIES = 2
+
     # CatalogSearchError is not a general error, but specific to this class.
     CatalogSearchError = CatalogSearchError
 
@@ -90,11 +107,80 @@ class CatalogSearch:
 
         self._catalog_url = catalog_url
 
+        # Headers are the same for every request, so create them once.
+        self._headers = {
+            "X-Requested-With": "XMLHttpRequest",
+            "Content-Type": "application/json; charset=utf-8",
+            "Accept": "application/json, text/javascript, */*; q=0.01",
+            "Accept-Language": "en-US,en;q=0.8",
+            "Ls2pac-config-type": "pac",
+            "Ls2pac-config-name": "default - Go Live load",
+            "Referer": self._catalog_url,
+        }
+
+        # Sort and paging information is also the same for every request;
+        # only the filters, search term and start index vary.
+        self._search_template = {
+            "addToHistory": True,
+            "dbCodes": [],
+            "hitsPerPage": self.MAX_HITS_PER_PAGE,
+            "sortCriteria": "NewlyAdded",
+            "targetAudience": "",
+        }
+
+        # All requests go to the same host, so a session is used to keep
+        # the connection alive between requests rather than setting up a
+        # new TCP/TLS connection each time.  The pool blocks when all its
+        # connections are in use, so any additional concurrent requests
+        # wait for a kept-alive connection instead of opening a new one
+        # that would be discarded afterwards.  The search requests don't
+        # modify anything on the server, so it's safe to retry them;
+        # retries honor any Retry-After header if the server is rate
+        # limiting requests.
+        retries = Retry(
+            total=self.MAX_RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["POST"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=self.MAX_CONNECTIONS,
+            max_retries=retries,
+            pool_block=True,
+        )
+        self._session = requests.Session()
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
         # Current year as a string; used in filtering.
         self._year_filter = datetime.now().year
 
-    @staticmethod
-    def __timestamp():
+        # Used for 'cache busting'; an increment is added to the timestamp
+        # so that requests issued within the same millisecond are still
+        # unique.  See __timestamp().
+        self._timestamp_increment = count(1)
+
+    def __enter__(self):
+        """Return self so the instance can be used as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Release the session's connections when leaving the context."""
+        self.close()
+
+    def close(self):
+        """Close the session and release its pooled connections.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self._session.close()
+
+    def __timestamp(self):
         """Return a 13-digit timestamp; used as a 'cache buster' in requests.
 
         With the CARL.X system, the parameter '_' in a request appears to
@@ -103,20 +189,19 @@ class CatalogSearch:
         and if so, then new data is retrieved rather than using cached
         data.
 
-        As the CARL.X system uses a 13-digit timestamp, so will we.  To
-        get 13-digits, we multiply a timestamp by 1000.  That yields
-        zeros at the end of the number, so we add an increment to the end
-        to keep successive requests unique.
+        As the CARL.X system uses a 13-digit timestamp, so will we.  A
+        timestamp in milliseconds has 13 digits; an increment is added to
+        keep successive requests unique, even when requests are issued
+        concurrently within the same millisecond.
 
         Args:
             None
         Returns:
             int:  13-digit unique value
         """
-        CatalogSearch.TIMESTAMP_INCREMENT += 1
-        return int(mktime(gmtime()) * 1000) + CatalogSearch.TIMESTAMP_INCREMENT
+        return time_ns() // 1_000_000 + next(self._timestamp_increment)
 
-    def __issue_request(self, endpoint, author, filter_list):
+    def __issue_request(self, endpoint, author, filter_list, start_index=0):
         """Issues a POST request and tests for an error in the response.
 
         Generic function for search-related POST requests.
@@ -126,46 +211,37 @@ class CatalogSearch:
             author (str):  author's name for use in filter.
             filter_list (list):  list of dictionaries containing filter
                                  information; this is specific to the request.
+            start_index (int):  index of the first publication to return.
         Returns:
-            requests.models.Response:  request's response
+            dict:  decoded JSON data from the response.
         Raises:
-            CatalogSearchError:  request was bad, connnection failed or
-                                 timed out.
+            CatalogSearchError:  request was bad, connnection failed,
+                                 timed out or the response was not in
+                                 JSON format.
         """
-        headers = {
-            "X-Requested-With": "XMLHttpRequest",
-            "Content-Type": "application/json; charset=utf-8",
-            "Accept": "application/json, text/javascript, */*; q=0.01",
-            "Accept-Language": "en-US,en;q=0.8",
-            "Ls2pac-config-type": "pac",
-            "Ls2pac-config-name": "default - Go Live load",
-            "Referer": self._catalog_url,
-        }
-
         # Create the dictionary to contain filter, sort and other
         # information.  This dictionary will be converted to JSON format
-        # for the POST request.
+        # by requests when the POST request is issued.
         search_json = {
-            "addToHistory": True,
-            "dbCodes": [],
-            "hitsPerPage": CatalogSearch.MAX_HITS_PER_PAGE,
-            "sortCriteria": "NewlyAdded",
-            "startIndex": 0,
-            "targetAudience": "",
+            **self._search_template,
+            "startIndex": start_index,
             "facetFilters": filter_list,
             "searchTerm": author,
         }
 
         # Issue the request using the given URL endpoint.  Also, provide a
         # 'cache buster' timestamp, the json 'data' containing filter
-        # information, and a connection timeout value.
+        # information, and a connection timeout value.  The body is
+        # streamed so it can be decoded directly from the connection
+        # rather than first being buffered by requests.
         try:
-            response = requests.post(
+            response = self._session.post(
                 urljoin(self._catalog_url, endpoint),
                 params={"_": self.__timestamp()},
-                data=json.dumps(search_json),
-                headers=headers,
+                json=search_json,
+                headers=self._headers,
                 timeout=self.TIMEOUT,
+                stream=True,
             )
         except requests.exceptions.RequestException as exc:
             raise CatalogSearchError(exc) from None
@@ -174,12 +250,41 @@ class CatalogSearch:
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError as exc:
+            response.close()
             raise CatalogSearchError(
                 f"Response to '{self._catalog_url}' {endpoint} request:  {exc}"
             ) from None
 
-        # Return a successful response.
-        return response
+        # Convert the data in the response from JSON format to a dictionary.
+        return self.__decode_response(response)
+
+    @staticmethod
+    def __decode_response(response):
+        """Convert the JSON data in a response to a dictionary.
+
+        orjson is used rather than response.json() as it decodes the raw
+        bytes of the body directly and is considerably faster than the
+        standard library's json module.  The body of the streamed response
+        is read in one call and the response is closed afterwards, which
+        returns the connection to the session's pool.
+
+        Args:
+            response (requests.models.Response):  request's response
+        Returns:
+            dict:  decoded JSON data
+        Raises:
+            CatalogSearchError:  the body couldn't be read or the response
+                                 was not in JSON format.
+        """
+        with response:
+            try:
+                return orjson.loads(response.raw.read(decode_content=True))
+            except Urllib3Error as exc:
+                raise CatalogSearchError(exc) from None
+            except orjson.JSONDecodeError as exc:
+                raise CatalogSearchError(
+                    f"Bad JSON data in response:  {exc}"
+                ) from None
 
     def __publications_count(self, author, filter_list):
         """Request total number of publications for the given author.
@@ -194,15 +299,7 @@ class CatalogSearch:
             CatalogSearchError:  request failed or response was not in
                                  JSON format.
         """
-        response = self.__issue_request("search/count", author, filter_list)
-
-        # Convert the data in the response from JSON format to a dictionary.
-        try:
-            decoded_data = response.json()
-        except ValueError as exc:
-            raise CatalogSearchError(
-                f"Bad JSON data in response:  {exc}"
-            ) from None
+        decoded_data = self.__issue_request("search/count", author, filter_list)
 
         # One of the fields in the data is a 'success' indicator; check
         # that the value is true.
@@ -215,17 +312,18 @@ class CatalogSearch:
         # Return the other field in the data that indicates the total number
         # of available publications.
         self.logger.debug(
-            f"Expected number of matches:  {decoded_data['totalHits']}"
+            "Expected number of matches:  %s", decoded_data["totalHits"]
         )
         return decoded_data["totalHits"]
 
-    def __publications(self, author, filter_list):
+    def __publications(self, author, filter_list, start_index):
         """Request a page of publications for the given author.
 
         Args:
             author (str):  author's name for use in filter.
             filter_list (list):  list of dictionaries containing filter
                                  information, e.g., year and media type.
+            start_index (int):  index of the first publication in the page.
         Returns:
             dictionary: information on all the publications matching the
                         filters.  The number returned will not exceed
@@ -234,17 +332,14 @@ class CatalogSearch:
             CatalogSearchError:  request failed or response was not in
                                  JSON format.
         """
-        response = self.__issue_request("search", author, filter_list)
-
-        # Convert the data in the response from JSON format to a dictionary.
-        try:
-            decoded_data = response.json()
-        except ValueError as exc:
-            raise CatalogSearchError(
-                f"Bad JSON data in response:  {exc}"
-            ) from None
+        decoded_data = self.__issue_request(
+            "search", author, filter_list, start_index
+        )
 
-        self.logger.debug(f"Decoded response from search:  {decoded_data}")
+        # The decoded data can be large, so only format it if it will be
+        # logged.
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Decoded response from search:  %s", decoded_data)
         return decoded_data["resources"]
 
     @staticmethod
@@ -269,22 +364,102 @@ class CatalogSearch:
             publications that were not excluded by the filters.
         """
         for publication in publications:
+            short_author, pub_format, pub_title = _PUBLICATION_FIELDS(
+                publication
+            )
+
             # Some books don't have authors - don't know why,
             # but 'The Mystery Writers of America cookbook' is one
             # of them; it shows up in a search for Sue Grafton.
-            if not publication["shortAuthor"]:
-                continue
+            if short_author and author in short_author:
+                filtered_results.append(
+                    (pub_format or "Unknown", pub_title or "Unknown")
+                )
 
-            pub_format = "Unknown"
-            if publication["format"]:
-                pub_format = publication["format"]
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def __filter_list(year, media):
+        """Return the facet filters for the given year and media type.
+
+        The same filters are used for every author searched with the given
+        year and media type, so they are cached.  The returned list is
+        shared and must not be modified.
 
-            pub_title = "Unknown"
-            if publication["shortTitle"]:
-                pub_title = publication["shortTitle"]
+        Args:
+            year (str):  publication year to filter on.
+            media (str):  FacetName of the media type to filter on.
+        Returns:
+            list:  list of dictionaries containing filter information.
+        """
+        return [
+            {"facetDisplay": year, "facetValue": year, "facetName": "Year"},
+            {
+                "facetDisplay": media,
+                "facetValue": media,
+                "facetName": "Format",
+            },
+        ]
+
+    def __search_year(self, author, media, year):
+        """Perform the catalog search for a single publication year.
 
-            if author in publication["shortAuthor"]:
-                filtered_results.append((pub_format, pub_title))
+        Args:
+            author (str):  author's name for use in filter.
+            media (str):  FacetName of the media type to filter on.
+            year (str):  publication year to filter on.
+        Returns:
+            list:  list of tuples containing the media type and publication
+                   title for all publications in the given year.
+        Raises:
+            CatalogSearchError:  requests failed, responses were invalid or
+                                 unexpected.
+        """
+        filter_list = self.__filter_list(year, media)
+
+        # Most searches find less than a page of publications, so request
+        # the first page before asking how many publications to expect.
+        # A partial page means there are no more publications, which
+        # saves the round trip for the count request.
+        filtered_results = []
+        publications = self.__publications(author, filter_list, 0)
+        self.__apply_local_filters(author, publications, filtered_results)
+        if len(publications) < self.MAX_HITS_PER_PAGE:
+            return filtered_results
+
+        # Determine how many publications to expect so we know how many
+        # more pages to request.
+        total_count = self.__publications_count(author, filter_list)
+        start_indexes = range(
+            self.MAX_HITS_PER_PAGE, total_count, self.MAX_HITS_PER_PAGE
+        )
+        if not start_indexes:
+            return filtered_results
+
+        # Each page is independent of the others, so request the remaining
+        # pages concurrently rather than waiting on each round trip.
+        # The pages are returned in order of their start index.
+        with ThreadPoolExecutor(
+            max_workers=min(self.MAX_PAGE_WORKERS, len(start_indexes))
+        ) as executor:
+            pages = executor.map(
+                self.__publications,
+                repeat(author),
+                repeat(filter_list),
+                start_indexes,
+            )
+            for publications in pages:
+                # An empty page means the catalog has fewer publications
+                # than it reported; later pages will be empty as well.
+                if not publications:
+                    break
+
+                # Apply additional filters that can't be handled in the
+                # POST request.
+                self.__apply_local_filters(
+                    author, publications, filtered_results
+                )
+
+        return filtered_results
 
     def search(self, author, media_type):
         """Perform the catalog search and parse the response.
@@ -313,52 +488,51 @@ class CatalogSearch:
         # Media type one of the acceptable types?
         try:
             media = Configurator.validate_media_type(media_type)
-        except Invalid as exc:
+        except ValueError as exc:
             raise CatalogSearchError(exc) from None
 
         # Perform two sets of requests - one for publications within the
-        # current year and one for publications of an unknown year.
+        # current year and one for publications of an unknown year.  The
+        # two sets are independent, so they're performed concurrently.
         filtered_results = []
-        for year in ["unknown", self._year_filter]:
-            filter_list = [
-                {"facetDisplay": year, "facetValue": year, "facetName": "Year"},
-                {
-                    "facetDisplay": media,
-                    "facetValue": media,
-                    "facetName": "Format",
-                },
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(self.__search_year, author, media, year)
+                for year in ["unknown", self._year_filter]
             ]
+            for future in futures:
+                filtered_results.extend(future.result())
 
-            # Determine how many publications to expect so we know when
-            # to stop issuing requests.
-            total_count = self.__publications_count(author, filter_list)
-
-            if total_count == 0:
-                continue
+        # Return the list of tuples.
+        return filtered_results
 
-            # Loop issuing requests until all the publications have been
-            # retrieved
-            accumulated_count = 0
-            while accumulated_count < total_count:
-                publications = self.__publications(author, filter_list)
+    def search_many(self, queries, max_concurrency=4):
+        """Perform catalog searches for several authors concurrently.
 
-                accumulated_count += len(publications)
+        Each search is independent of the others, so up to max_concurrency
+        searches are performed at the same time over the shared session.
 
-                # Apply additional filters that can't be handled in the
-                # POST request.
-                self.__apply_local_filters(
-                    author, publications, filtered_results
-                )
-
-            # If we retrieve more publications than expected, raise an error.
-            if accumulated_count > total_count:
-                raise CatalogSearchError(
-                    f"Received more publications than expected; expected "
-                    f"{total_count}, currently have {accumulated_count}"
-                )
-
-        # Return the list of tuples.
-        return filtered_results
+        Args:
+            queries (iterable):  (author, media_type) tuples; see search()
+                                 for a description of each value.
+            max_concurrency (int):  maximum number of searches performed
+                                    at the same time.
+        Returns:
+            dict:  the results of search() for each (author, media_type)
+                   tuple, in the same order as the queries.
+        Raises:
+            CatalogSearchError:  arguments were invalid, requests failed,
+                                 responses were invalid or unexpected.
+        """
+        queries = list(queries)
+        if not queries:
+            return {}
+
+        with ThreadPoolExecutor(
+            max_workers=min(max_concurrency, len(queries))
+        ) as executor:
+            results = executor.map(lambda query: self.search(*query), queries)
+            return dict(zip(queries, results))
 
     @property
     def year_filter(self):
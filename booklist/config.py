@@ -12,7 +12,8 @@ The ConfigError class is used to report errors found in the configuration
 file.
 
 ---------------------------------------------------------------------------
-The config file is expected to be in in YAML format.  The tags are:
+The config file is expected to be in in YAML format; as JSON is a subset of
+YAML, a JSON file with the same tags is also accepted.  The tags are:
 
 catalog-url:
     Required.  Must be a valid URL for a website using the CARL.X
@@ -66,18 +67,49 @@ Example YAML config file:
           lastname: McCall Smith
 """
 
+import copy
+import functools
 import logging
+import os
+from pathlib import Path
+from types import MappingProxyType
+from urllib.parse import urlsplit
 
-from voluptuous import (
-    All,
-    Invalid,
-    Length,
-    MultipleInvalid,
-    Required,
-    Schema,
-    Url,
-)
-from yaml import YAMLError, safe_load
+import orjson
+from yaml import YAMLError, load
+
+# Use the libyaml-based loader if PyYAML was built with it; it's much
+# faster than the pure Python loader.
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as _YamlLoader
+
+
+# Used by the module-level caches, which aren't tied to a Configurator and
+# its caller's logger.
+_logger = logging.getLogger(__name__)
+
+# Version of the on-disk cache of validated config files; change it if the
+# structure of the validated contents or the validation rules change.
+_CACHE_VERSION = 1
+
+
+def _cache_path():
+    """Return the path of the file caching the last validated config file.
+
+    The file is placed in the user's cache directory, i.e., $XDG_CACHE_HOME
+    or ~/.cache if that isn't set.
+
+    Returns:
+        pathlib.Path:  path of the cache file
+
+    Raises:
+        RuntimeError:  XDG_CACHE_HOME isn't set and the home directory
+            can't be determined.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home, "booklist", "config.json")
 
 
 class ConfigError(Exception):
@@ -90,23 +122,299 @@ class ConfigError(Exception):
     """
 
 
+def _url(value):
+    """Validator for a URL; the URL must use the http or https scheme.
+
+    Args:
+        value:  value from the config file
+
+    Returns:
+        str:  the given value
+
+    Raises:
+        ValueError:  value is not a string or not a valid URL
+    """
+    if not isinstance(value, str):
+        raise ValueError("expected str")
+    parsed = urlsplit(value)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        raise ValueError("expected a URL")
+    return value
+
+
+def _non_empty_string(value):
+    """Validator for a string that must not be empty.
+
+    Args:
+        value:  value from the config file
+
+    Returns:
+        str:  the given value
+
+    Raises:
+        ValueError:  value is not a string or is empty
+    """
+    if not isinstance(value, str):
+        raise ValueError("expected str")
+    if not value:
+        raise ValueError("length of value must be at least 1")
+    return value
+
+
+def _media_type(value):
+    """Validator for a media type; transforms it to a FacetName.
+
+    Args:
+        value:  value from the config file
+
+    Returns:
+        str:  MEDIA_TYPES['FacetName'] equivalent for given value
+
+    Raises:
+        ValueError:  value is not a string or is not one of the acceptable
+            media type names
+    """
+    if not isinstance(value, str):
+        raise ValueError("expected str")
+    return Configurator.validate_media_type(value)
+
+
+# Validation rules for the YAML configuration file.  Each allowed tag is
+# mapped to whether it's required and to the validator for its value.  A
+# validator returns the (possibly transformed) value; a list containing
+# a map of rules is used for a list of entries that follow those rules.
+#
+# Config files found in the on-disk cache aren't validated again, so any
+# change to these rules or their validators must be accompanied by a bump
+# of _CACHE_VERSION; otherwise results validated by the old rules are used.
+_AUTHOR_RULES = {
+    "firstname": (True, _non_empty_string),
+    "lastname": (True, _non_empty_string),
+    "media-type": (False, _media_type),
+}
+_CONFIG_RULES = {
+    "catalog-url": (True, _url),
+    "media-type": (False, _media_type),
+    "authors": (True, [_AUTHOR_RULES]),
+}
+
+
+def _check_list(value, rules, path, errors):
+    """Validate each entry of a list against a map of rules.
+
+    Args:
+        value:  list from the config file
+        rules (dict):  rules each entry in the list must follow
+        path (str):  location of the list; used in error messages
+        errors (list):  error messages are appended to this list
+
+    Returns:
+        list:  the validated and transformed entries; None if value
+            isn't a list.
+    """
+    if not isinstance(value, list):
+        errors.append(f"expected a list for dictionary value @ {path}")
+        return None
+    return [
+        _check_map(entry, rules, f"{path}[{index}]", errors)
+        for index, entry in enumerate(value)
+    ]
+
+
+def _check_map(value, rules, path, errors):
+    """Validate a map from the config file against a map of rules.
+
+    Args:
+        value:  map from the config file
+        rules (dict):  rules the map must follow
+        path (str):  location of the map; used in error messages
+        errors (list):  error messages are appended to this list
+
+    Returns:
+        dict:  the validated and transformed map; None if value isn't a
+            map.
+    """
+    if not isinstance(value, dict):
+        errors.append(f"expected a dictionary @ {path}")
+        return None
+
+    result = {}
+    for key, entry in value.items():
+        key_path = f"{path}[{key!r}]"
+        if key not in rules:
+            errors.append(f"extra keys not allowed @ {key_path}")
+            continue
+
+        validator = rules[key][1]
+        if isinstance(validator, list):
+            result[key] = _check_list(entry, validator[0], key_path, errors)
+            continue
+        try:
+            result[key] = validator(entry)
+        except ValueError as exc:
+            errors.append(f"{exc} for dictionary value @ {key_path}")
+
+    for key, (required, _) in rules.items():
+        if required and key not in value:
+            errors.append(f"required key not provided @ {path}[{key!r}]")
+    return result
+
+
+def _parse(data):
+    """Return the YAML data parsed from the given bytes.
+
+    As JSON is a subset of YAML, data that looks like a JSON object or array
+    is first parsed as JSON, which is much faster.  Anything that isn't
+    valid JSON is parsed as YAML.
+
+    Args:
+        data (bytes):  the config file's contents
+
+    Returns:
+        YAML data; a dict if the config file is valid.
+
+    Raises:
+        YAMLError, TypeError:  The data isn't valid YAML.
+    """
+    if data.lstrip()[:1] in (b"{", b"["):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Possibly a YAML flow mapping or sequence.
+            pass
+
+    # Read the YAML formatted information using a safe loader.  A safe
+    # loader will only recognize standard YAML tags and can't construct an
+    # arbitrary Python object.  As the config file only requires strings
+    # and a uri, a safe loader will suffice.
+    return load(data, Loader=_YamlLoader)
+
+
+@functools.lru_cache(maxsize=64)
+def _validate_text(data):
+    """Parse and validate config contents; the result is cached.
+
+    Identical contents are only parsed and validated once, no matter which
+    file or string they came from.
+
+    Args:
+        data (bytes):  the config file's contents
+
+    Returns:
+        tuple:  map of configuration values and a tuple of error messages;
+            the contents are valid if there are no error messages.  The
+            map is shared by all callers, so it must not be modified.
+
+    Raises:
+        YAMLError, TypeError:  The data isn't valid YAML.
+    """
+    errors = []
+    dict_config = _check_map(_parse(data), _CONFIG_RULES, "data", errors)
+    return dict_config, tuple(errors)
+
+
+def _read_cache(key):
+    """Return the validated config contents cached on disk, if any.
+
+    Args:
+        key (tuple):  identifies the config file and its version
+
+    Returns:
+        dict:  Map of configuration values; None if there are no cached
+            contents for the given key.
+    """
+    try:
+        cached_key, dict_config = orjson.loads(_cache_path().read_bytes())
+    except FileNotFoundError:
+        return None
+    except (
+        OSError,
+        RuntimeError,
+        orjson.JSONDecodeError,
+        TypeError,
+        ValueError,
+    ) as exc:
+        # A missing, unreadable or corrupt cache, or no home directory
+        # to keep it in, only means the config file has to be read and
+        # validated.
+        _logger.debug("Config cache not read:  %s", exc)
+        return None
+    return dict_config if cached_key == list(key) else None
+
+
+def _write_cache(key, dict_config):
+    """Cache the validated config contents on disk.
+
+    Args:
+        key (tuple):  identifies the config file and its version
+        dict_config (dict):  Map of configuration values
+    """
+    try:
+        path = _cache_path()
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path.write_bytes(orjson.dumps([key, dict_config]))
+        os.replace(temp_path, path)
+    except (OSError, RuntimeError, orjson.JSONEncodeError) as exc:
+        _logger.debug("Config cache not written:  %s", exc)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_validated(filename, mtime_ns, size):
+    """Read and validate a config file; the result is cached.
+
+    The result is shared by every Configurator for the same file, so in a
+    long-lived process an unchanged file is only read and validated once.
+    Valid contents are also cached on disk for later runs.
+
+    Args:
+        filename (str):  absolute path of the config file.
+        mtime_ns (int):  modification time of the config file; used with
+            the size to detect changes to the file.
+        size (int):  size of the config file.
+
+    Returns:
+        tuple:  map of configuration values and a tuple of error messages,
+            as returned by _validate_text().  The map is shared by all
+            callers, so it must not be modified.
+
+    Raises:
+        OSError:  The file can't be read.
+        YAMLError, TypeError:  The file isn't valid YAML.
+    """
+    # The path is hex-encoded as it may not be valid UTF-8, which JSON
+    # requires.
+    cache_key = (_CACHE_VERSION, os.fsencode(filename).hex(), mtime_ns, size)
+    dict_config = _read_cache(cache_key)
+    if dict_config is not None:
+        _logger.debug("Config object read from cache")
+        return dict_config, ()
+
+    # The file is small, so it's read in one call and the parser is handed
+    # the whole buffer rather than reading it from a file in chunks.
+    dict_config, errors = _validate_text(Path(filename).read_bytes())
+    if not errors:
+        _write_cache(cache_key, dict_config)
+    return dict_config, errors
+
+
 class Configurator:
     """Handles configuration file processing for the booklist.
 
-    Refer to self._schema for the expected config file format.
+    Refer to _CONFIG_RULES for the expected config file format.
     """
 
     # ConfigError is not a general error, but specific to this class.
     ConfigError = ConfigError
 
-    # The following list contains most of the supported media types
-    # allowed by the CARL-X ILS.  This is a list of maps, with each map
-    # consisting of a media type config name and the equivalent name for
-    # use in the URL query string.
+    # The following map contains most of the supported media types
+    # allowed by the CARL-X ILS.  Each media type config name is mapped to
+    # the equivalent name for use in the URL query string.  The map is
+    # read-only as it's shared by all instances.
     #
     # Note:  when validating the media type name found in the config file,
-    # the name will first be converted to lower case before comparing it
-    # against this list.
+    # the name will first be converted to lower case before looking it up
+    # in this map.
     #
     # Note2:  Some media types don't have a "shortAuthor" field and as
     # responses without an author are ignored, no values are returned.
@@ -118,20 +426,26 @@ class Configurator:
     # detailed information shows unique ids for the entries.  Examples of
     # those media types: eAudioBook and AudioBook.  So the "e" version of
     # the media type is allowed and the non-"e" version is not.
-    MEDIA_TYPES = [
-        {"configName": "book", "FacetName": "Book"},
+    _CONFIG_TO_FACET = MappingProxyType(
         {
-            "configName": "electronic resource",
-            "FacetName": "Electronic Resource",
-        },
-        {"configName": "ebook", "FacetName": "eBook"},
-        {"configName": "eaudiobook", "FacetName": "eAudioBook"},
-        {"configName": "book on cd", "FacetName": "Book on CD"},
-        {"configName": "large print", "FacetName": "Large Print"},
-        {"configName": "music cd", "FacetName": "Music CD"},
-        {"configName": "dvd", "FacetName": "DVD"},
-        {"configName": "blu-ray", "FacetName": "Blu-Ray"},
-        {"configName": "emusic", "FacetName": "eMusic"},
+            "book": "Book",
+            "electronic resource": "Electronic Resource",
+            "ebook": "eBook",
+            "eaudiobook": "eAudioBook",
+            "book on cd": "Book on CD",
+            "large print": "Large Print",
+            "music cd": "Music CD",
+            "dvd": "DVD",
+            "blu-ray": "Blu-Ray",
+            "emusic": "eMusic",
+        }
+    )
+
+    # The media types as a list of maps with 'configName' and 'FacetName'
+    # keys; kept for callers that iterate over the media types.
+    MEDIA_TYPES = [
+        {"configName": config_name, "FacetName": facet_name}
+        for config_name, facet_name in _CONFIG_TO_FACET.items()
     ]
     DEFAULT_MEDIA_TYPE = "Book"
 
@@ -150,24 +464,37 @@ class Configurator:
         self._filename = config_filename
         self.logger.info("Config file:  %s", self._filename)
 
-        # Validation rules for YAML configuration file.
-        self._schema = Schema(
-            {
-                Required("catalog-url"): All(Url(str), Length(min=1)),
-                "media-type": All(str, Configurator.validate_media_type),
-                Required("authors"): [
-                    {
-                        Required("firstname"): All(str, Length(min=1)),
-                        Required("lastname"): All(str, Length(min=1)),
-                        "media-type": All(
-                            str, Configurator.validate_media_type
-                        ),
-                    }
-                ],
-            }
-        )
+        # Config contents given as a string rather than read from the
+        # file; see from_string().
+        self._text = None
+
+    @classmethod
+    def from_string(cls, text, logger=None):
+        """Return a Configurator for config contents given as a string.
+
+        The contents are validated in the same way as a config file, but
+        without reading a file.  The validated result is cached in memory
+        by its contents, but never written to the on-disk cache.
+
+        Args:
+           text (str):  YAML-formatted config contents.
+           logger (logging instance):  caller's logger
+
+        Returns:
+            Configurator:  validates the given contents
+
+        Raises:
+            ConfigError:  text is not a string.
+        """
+        if not isinstance(text, str):
+            raise ConfigError("Config contents must be a string")
+
+        config = cls("<string>", logger)
+        config._text = text
+        return config
 
     @staticmethod
+    @functools.lru_cache(maxsize=64)
     def validate_media_type(media_type):
         """Returns exception if media type invalid, else FacetName string.
 
@@ -175,6 +502,9 @@ class Configurator:
         is the media_type validated, but the value is transformed to the
         string needed for the URL request.
 
+        Config files name the same few media types over and over, so the
+        results are cached by the media_type as given.
+
         Args:
             media_type (str):  one of the MEDIA_TYPES['configName'] values
 
@@ -182,23 +512,23 @@ class Configurator:
             str:  MEDIA_TYPES['FacetName'] equivalent for given media_type
 
         Raises:
-            voluptuous.Invalid:  media_type is not one of the acceptable media
-                type names
+            ValueError:  media_type is not one of the acceptable media type
+                names
         """
-        media = media_type.lower()
-        facet_name = None
-        for mapping in Configurator.MEDIA_TYPES:
-            if mapping["configName"] == media:
-                facet_name = mapping["FacetName"]
-                break
-        else:
-            raise Invalid(f"Media type of '{media_type}' is invalid.")
-        return facet_name
+        try:
+            return Configurator._CONFIG_TO_FACET[media_type.casefold()]
+        except KeyError:
+            raise ValueError(
+                f"Media type of '{media_type}' is invalid."
+            ) from None
 
     def validate(self):
         """Return contents of config file if valid, else raise an exception.
 
         Reads and load the yaml file, then verifies it against the schema.
+        The validated contents are cached in memory and on disk, so the
+        file is only read and validated again if its modification time or
+        size has changed.
 
         Returns:
             dict:  Map of configuration values
@@ -207,37 +537,81 @@ class Configurator:
             ConfigError:  The file can't be found or read, the file is
                  malformed, or is not consistent with the schema.
         """
-        # Attempt to read the YAML-formatted config file.
-        yaml_config = None
+        if self._text is not None:
+            return copy.deepcopy(
+                self.__validate_data(_validate_text, self._text.encode())
+            )
+
+        filename = os.path.abspath(self._filename)
         try:
-            with open(self._filename, "r", encoding="utf-8") as fh_yamlfile:
-                try:
-                    # Read the YAML formatted information using safe_load().
-                    # safe_load() will only recognize standard YAML tags
-                    # and can't construct an arbitrary Python object.  As
-                    # the config file only requires strings and a uri,
-                    # safe_load() will suffice.
-                    yaml_config = safe_load(fh_yamlfile)
-                except (YAMLError, TypeError) as exc:
-                    raise ConfigError(
-                        f"Config file '{self._filename}' not a valid YAML "
-                        f"file:  {exc}"
-                    ) from None
-        except IOError as exc:
+            file_stat = os.stat(filename)
+        except OSError as exc:
             raise ConfigError(
                 f"Config file '{self._filename}': {exc}"
             ) from None
 
-        # Validate the YAML content against the schema and return the
-        # transformed content.
-        dict_config = None
+        # Return a copy so the caller can't modify the cached contents.
+        return copy.deepcopy(
+            self.__validate_data(
+                _load_validated,
+                filename,
+                file_stat.st_mtime_ns,
+                file_stat.st_size,
+            )
+        )
+
+    def reload(self):
+        """Discard any cached config file contents and validate again.
+
+        Both the in-memory and on-disk caches are discarded.
+
+        Returns:
+            dict:  Map of configuration values
+
+        Raises:
+            ConfigError:  The file can't be found or read, the file is
+                 malformed, or is not consistent with the schema.
+        """
+        _load_validated.cache_clear()
+        _validate_text.cache_clear()
+        try:
+            _cache_path().unlink(missing_ok=True)
+        except (OSError, RuntimeError) as exc:
+            self.logger.debug("Config cache not removed:  %s", exc)
+        return self.validate()
+
+    def __validate_data(self, validator, *args):
+        """Parse and validate the config contents.
+
+        Args:
+            validator (function):  _validate_text() or _load_validated()
+            args:  arguments for the validator
+
+        Returns:
+            dict:  Map of configuration values; shared with other callers,
+                so it must not be modified.
+
+        Raises:
+            ConfigError:  The file can't be read, the contents are
+                malformed or not consistent with the schema.
+        """
+        self.logger.debug("YAML loader:  %s", _YamlLoader.__name__)
         try:
-            dict_config = self._schema(yaml_config)
-        except MultipleInvalid as exc:
+            dict_config, errors = validator(*args)
+        except OSError as exc:
+            raise ConfigError(
+                f"Config file '{self._filename}': {exc}"
+            ) from None
+        except (YAMLError, TypeError) as exc:
+            raise ConfigError(
+                f"Config file '{self._filename}' not a valid YAML file:  {exc}"
+            ) from None
+
+        if errors:
             msg = [f"Config file '{self._filename}' fails schema validation: "]
-            for error in exc.errors:
-                msg.append(str(error))
-            raise ConfigError("\n".join(msg)) from None
+            msg.extend(errors)
+            raise ConfigError("\n".join(msg))
 
-        self.logger.debug(f"Config object:  {dict_config}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Config object:  %s", dict_config)
         return dict_config
@@ -43,6 +43,7 @@ Usage: booklist [-h] [-d] config_file
 
 import argparse
 import logging
+import os
 import sys
 
 from booklist.catalog import CatalogSearch
@@ -79,6 +80,39 @@ def cmdline_parser():
     return parser
 
 
+def _write_output(output):
+    """Write the given text to stdout in a single call.
+
+    The encoded text is written straight to the binary buffer underneath
+    stdout, using the same encoding as the text layer.  Anything already
+    written to the text layer is flushed first to keep the output in order.
+    As the text layer would, newlines are translated to the platform's line
+    separator.
+    Text streams without a buffer (e.g., io.StringIO) are written to
+    directly.
+
+    Args:
+        output (str):  text to be written
+
+    Returns:
+        None
+    """
+    stdout = sys.stdout
+    buffer = getattr(stdout, "buffer", None)
+    if buffer is None:
+        stdout.write(output)
+        return
+
+    if os.linesep != "\n":
+        output = output.replace("\n", os.linesep)
+
+    stdout.flush()
+    buffer.write(
+        output.encode(stdout.encoding or "utf-8", stdout.errors or "strict")
+    )
+    buffer.flush()
+
+
 def print_search_results(config_values, logger):
     """Retrieve and print the author publications for current year.
 
@@ -95,32 +129,43 @@ def print_search_results(config_values, logger):
     """
     # The default type is the value specified in the config file or
     # if not found, the standard default type.
-    default_media = Configurator.DEFAULT_MEDIA_TYPE
-    if config_values["media-type"]:
-        default_media = config_values["media-type"]
-
-    # Raises CatalogSearchError if constructor parameters are bad.
-    catalog = CatalogSearch(config_values["catalog-url"], logger)
+    default_media = (
+        config_values.get("media-type") or Configurator.DEFAULT_MEDIA_TYPE
+    )
 
-    for author_info in config_values["authors"]:
-        author_name = f"{author_info['lastname']}, {author_info['firstname']}"
-        media = default_media
-        if "media-type" in author_info:
-            media = author_info["media-type"]
+    # Gather the author name and media type for each search.
+    queries = [
+        (
+            f"{author_info['lastname']}, {author_info['firstname']}",
+            author_info.get("media-type", default_media),
+        )
+        for author_info in config_values["authors"]
+    ]
 
-        print(f"{author_name} -- {media}s:")
+    # Raises CatalogSearchError if constructor parameters are bad.  The
+    # searches are independent of one another, so they're performed
+    # concurrently; the results are printed in config file order.
+    with CatalogSearch(config_values["catalog-url"], logger) as catalog:
         # Raises CatalogSearchError if there are errors.
-        search_results = catalog.search(author_name, media)
-
-        # Print the search results; each entry in the results list
-        # is a tuple containing the media type and publication name
-        # (e.g., book title).  Since some media types are supersets
-        # of other media types, it seemed useful to provide that
-        # extra information.
+        all_results = catalog.search_many(queries)
+
+    # Print the search results; each entry in the results list is a tuple
+    # containing the media type and publication name (e.g., book title).
+    # Since some media types are supersets of other media types, it seemed
+    # useful to provide that extra information.  The output is collected
+    # and written at once rather than printed a line at a time.
+    lines = []
+    for author_name, media in queries:
+        lines.append(f"{author_name} -- {media}s:\n")
+        search_results = all_results[(author_name, media)]
         if search_results:
-            max_width = len(max((info[0] for info in search_results), key=len))
-            for resource_info in search_results:
-                print(f"  [{resource_info[0]:{max_width}}]  {resource_info[1]}")
+            max_width = max(len(info[0]) for info in search_results)
+            row_fmt = f"  [{{:<{max_width}}}]  {{}}\n"
+            lines.extend(
+                row_fmt.format(media_name, title)
+                for media_name, title in search_results
+            )
+    _write_output("".join(lines))
 
 
 def main():
@@ -0,0 +1,19 @@
+"""Fixtures shared by the test modules."""
+
+import pytest
+from yaml import load
+
+from booklist.config import _YamlLoader
+
+
+@pytest.fixture(scope="session", autouse=True)
+def yaml_loader_warmup():
+    """Parse a small document so one-time loader setup happens up front."""
+    load("warmup: 1", Loader=_YamlLoader)
+
+
+@pytest.fixture(autouse=True)
+def config_cache_home(tmp_path, monkeypatch):
+    """Keep the validated config cache out of the user's cache directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache"
@@ -1,7 +1,11 @@
 """Test cases related to the CatalogSearch class"""
 
+import json
 import logging
+import threading
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
 
 import pytest
 
@@ -15,6 +19,83 @@ def catalog_url(scope="module"):  # pylint: disable=unused-argument
     return "https://catalog.library.loudoun.gov"
 
 
+class FakeCatalogHandler(BaseHTTPRequestHandler):
+    """Answers search requests the way a CARL.X catalog website does.
+
+    The number of publications reported by 'search/count' for a year is
+    taken from the server's 'reported' map; the publications actually
+    returned by 'search' are limited by its 'available' map, if the year
+    is in it.  Every request is recorded as an (endpoint, year, start
+    index) tuple in the server's 'requests' list.
+
+    Like a server that doesn't support conditional POST requests, every
+    response carries an ETag, but a request with a precondition fails
+    with 412 Precondition Failed.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        server = self.server
+        length = int(self.headers["Content-Length"])
+        search_json = json.loads(self.rfile.read(length))
+        endpoint = urlsplit(self.path).path.strip("/")
+        year = str(search_json["facetFilters"][0]["facetValue"])
+        start_index = search_json["startIndex"]
+        with server.lock:
+            server.requests.append((endpoint, year, start_index))
+
+        reported = server.reported.get(year, 0)
+        if endpoint == "search/count":
+            data = {"success": True, "totalHits": reported}
+        else:
+            available = server.available.get(year, reported)
+            stop = min(available, start_index + search_json["hitsPerPage"])
+            data = {
+                "resources": [
+                    {
+                        "shortAuthor": "Grafton, Sue",
+                        "format": "Book",
+                        "shortTitle": f"{year}-{index}",
+                    }
+                    for index in range(start_index, stop)
+                ]
+            }
+
+        status = 200
+        if (
+            "If-None-Match" in self.headers
+            or "If-Modified-Since" in self.headers
+        ):
+            status, data = 412, {"success": False}
+
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", f'"{endpoint}-{year}-{start_index}"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fake_catalog():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCatalogHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.reported = {}
+    server.available = {}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 @pytest.fixture
 def sue_grafton_publications(scope="module"):
     # pylint: disable=unused-argument
@@ -44,10 +125,9 @@ def test_good_init_with_logger(catalog_url):
 
 
 def test_no_url_in_init():
-    with pytest.raises(CatalogSearchError) as excinfo:
+    with pytest.raises(CatalogSearchError, match="argument"):
         empty_url = None
         CatalogSearch(empty_url)
-    assert "argument" in str(excinfo.value)
 
 
 def test_get_year_filter(catalog_url):
@@ -91,20 +171,86 @@ def test_good_search_by_media(catalog_url, sue_grafton_publications):
 
 def test_bad_url():
     catalog = CatalogSearch("http://nosuchurl.com")
-    with pytest.raises(CatalogSearchError) as excinfo:
+    with pytest.raises(CatalogSearchError, match="Name or service not known"):
         catalog.search("Grafton, Sue", "Book")
-    assert "Name or service not known" in str(excinfo.value)
 
 
 def test_bad_search_by_media(catalog_url):
     catalog = CatalogSearch(catalog_url)
-    with pytest.raises(CatalogSearchError) as excinfo:
+    with pytest.raises(CatalogSearchError, match="Media type"):
         catalog.search("Grafton, Sue", "bad media")
-    assert "Media type" in str(excinfo.value)
 
 
 def test_bad_search_no_media(catalog_url):
     catalog = CatalogSearch(catalog_url)
-    with pytest.raises(CatalogSearchError) as excinfo:
+    with pytest.raises(CatalogSearchError, match="Arguments"):
         catalog.search("Grafton, Sue", "")
-    assert "Arguments" in str(excinfo.value)
+
+
+def test_context_manager(catalog_url):
+    with CatalogSearch(catalog_url) as catalog:
+        assert isinstance(catalog, CatalogSearch)
+
+
+def test_bad_search_many_by_media(catalog_url):
+    catalog = CatalogSearch(catalog_url)
+    with pytest.raises(CatalogSearchError, match="Media type"):
+        catalog.search_many([("Grafton, Sue", "bad media")])
+
+
+def test_search_many_no_queries(catalog_url):
+    catalog = CatalogSearch(catalog_url)
+    assert not catalog.search_many([])
+
+
+@pytest.mark.parametrize(
+    "total,count_requests,page_starts",
+    [
+        # A partial first page; no need to ask for the count.
+        (5, 0, [0]),
+        # A full first page, but the count shows there are no more pages.
+        (30, 1, [0]),
+        # A full first page; the remaining pages are requested together.
+        (75, 1, [0, 30, 60]),
+    ],
+)
+def test_search_paging(fake_catalog, total, count_requests, page_starts):
+    fake_catalog.reported["2015"] = total
+    with CatalogSearch(fake_catalog.url) as catalog:
+        catalog.year_filter = "2015"
+        results = catalog.search("Grafton, Sue", "Book")
+
+    assert results == [("Book", f"2015-{index}") for index in range(total)]
+    year_requests = [req for req in fake_catalog.requests if req[1] == "2015"]
+    assert (
+        len([req for req in year_requests if req[0] == "search/count"])
+        == count_requests
+    )
+    assert (
+        sorted(req[2] for req in year_requests if req[0] == "search")
+        == page_starts
+    )
+
+
+def test_search_paging_early_empty_page(fake_catalog):
+    # The count promises more publications than the catalog returns.
+    fake_catalog.reported["2015"] = 120
+    fake_catalog.available["2015"] = 40
+    with CatalogSearch(fake_catalog.url) as catalog:
+        catalog.year_filter = "2015"
+        results = catalog.search("Grafton, Sue", "Book")
+
+    assert results == [("Book", f"2015-{index}") for index in range(40)]
+
+
+def test_repeated_searches(fake_catalog):
+    # Repeating a request must not make it conditional on the ETag of the
+    # earlier response; the fake catalog rejects those with a 412.
+    fake_catalog.reported["2015"] = 75
+    expected = [("Book", f"2015-{index}") for index in range(75)]
+    queries = [("Grafton, Sue", "Book"), ("Grafton, Sue", "Book")]
+    with CatalogSearch(fake_catalog.url) as catalog:
+        catalog.year_filter = "2015"
+        assert catalog.search("Grafton, Sue", "Book") == expected
+        assert catalog.search("Grafton, Sue", "Book") == expected
+        assert catalog.search_many(queries) == {queries[0]: expected}
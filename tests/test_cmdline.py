@@ -1,16 +1,35 @@
 """Test cases related to the command line processing."""
 
+import io
 import logging
+import os
 from textwrap import dedent
 
 import pytest
 
 from booklist.catalog import CatalogSearchError
 from booklist.config import Configurator
-from booklist.main import cmdline_parser, print_search_results
+from booklist.main import _write_output, cmdline_parser, print_search_results
 
 # pylint: disable=missing-docstring
 
+# Config file contents, encoded once at import time.
+GOOD_RUN_CONFIG = dedent("""
+    catalog-url: https://catalog.library.loudoun.gov/
+    media-type: ebook
+    authors:
+       - firstname: James
+         lastname: Patterson
+         media-type: book
+    """).encode()
+BAD_URL_CONFIG = dedent("""
+    catalog-url: http://loudoun.gov/
+    media-type: ebook
+    authors:
+       - firstname: Sue
+         lastname: Grafton
+    """).encode()
+
 
 @pytest.fixture(scope="session", autouse=True)
 def create_parser():
@@ -35,17 +54,9 @@ def test_no_required_args(capsys, create_parser):
     assert "arguments are required" in err
 
 
-def test_good_run(tmpdir, capsys):
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    media-type: ebook
-    authors:
-       - firstname: James
-         lastname: Patterson
-         media-type: book
-    """
-    path = tmpdir.join("goodrun")
-    path.write(dedent(config_in))
+def test_good_run(tmp_path, capsys):
+    path = tmp_path / "goodrun"
+    path.write_bytes(GOOD_RUN_CONFIG)
     config = Configurator(str(path))
     config_values = config.validate()
     logger = logging.getLogger()
@@ -56,18 +67,21 @@ def test_good_run(tmpdir, capsys):
     assert "Book" in out
 
 
-def test_bad_url(tmpdir):
-    config_in = """
-    catalog-url: http://loudoun.gov/
-    media-type: ebook
-    authors:
-       - firstname: Sue
-         lastname: Grafton
-    """
-    path = tmpdir.join("goodrun")
-    path.write(dedent(config_in))
+def test_bad_url(tmp_path):
+    path = tmp_path / "goodrun"
+    path.write_bytes(BAD_URL_CONFIG)
     config = Configurator(str(path))
     config_values = config.validate()
-    with pytest.raises(CatalogSearchError) as excinfo:
+    with pytest.raises(CatalogSearchError, match="Response to"):
         print_search_results(config_values, logging.getLogger())
-    assert "Response to" in str(excinfo.value)
+
+
+@pytest.mark.parametrize("linesep", ["\n", "\r\n"])
+def test_write_output_line_endings(monkeypatch, linesep):
+    # Newlines are translated as the text layer of stdout would.
+    monkeypatch.setattr(os, "linesep", linesep)
+    raw = io.BytesIO()
+    stdout = io.TextIOWrapper(raw, encoding="utf-8")
+    monkeypatch.setattr("sys.stdout", stdout)
+    _write_output("first\nsecond\n")
+    assert raw.getvalue() == f"first{linesep}second{linesep}".encode()
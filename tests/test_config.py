@@ -1,336 +1,289 @@
 """Test cases related to the Configurator class"""
 
-from textwrap import dedent
-
-from pytest import raises
-
-from booklist.config import ConfigError, Configurator
-
-# pylint: disable=missing-docstring
-
-
-def test_good_config(tmpdir):
-    # Good YAML content.
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    media-type: Book
-    authors:
-        - firstname: Sue
-          lastname: Grafton
-          media-type: eBook
-
-        - firstname: Stephen
-          lastname: King
-    """
-    # Expected output:  the same YAML content but in a Python dictionary.
-    config_out = {
+import logging
+import os
+from pathlib import Path
+
+from pytest import fixture, mark, raises
+
+from booklist.config import ConfigError, Configurator, _load_validated
+
+# pylint: disable=missing-docstring,redefined-outer-name
+
+# Directory containing the config files used by the tests.
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+# Expected output for the good YAML content:  the same content but in a
+# Python dictionary.
+GOOD_CONFIG = {
+    "catalog-url": "https://catalog.library.loudoun.gov/",
+    "media-type": "Book",
+    "authors": [
+        {"firstname": "Sue", "lastname": "Grafton", "media-type": "eBook"},
+        {"firstname": "Stephen", "lastname": "King"},
+    ],
+}
+
+# Config file contents for each of the media types; see
+# test_media_type_transformation().
+MEDIA_TEMPLATE = """
+catalog-url: https://catalog.library.loudoun.gov/
+media-type: {media}
+authors:
+    - firstname: Sue
+      lastname: Grafton
+"""
+
+# Expected output for MEDIA_TEMPLATE, less the media type.
+MEDIA_CONFIG = {
+    "catalog-url": "https://catalog.library.loudoun.gov/",
+    "authors": [{"firstname": "Sue", "lastname": "Grafton"}],
+}
+
+# Names of valid config files in the fixtures directory and their expected
+# output.
+CASES_OK = {
+    "good_config": GOOD_CONFIG,
+    "extraneous_spaces": GOOD_CONFIG,
+    "quoted_text": {
         "catalog-url": "https://catalog.library.loudoun.gov/",
         "media-type": "Book",
         "authors": [
-            {"firstname": "Sue", "lastname": "Grafton", "media-type": "eBook"},
-            {"firstname": "Stephen", "lastname": "King"},
+            {"firstname": " ", "lastname": "Sue Grafton"},
+            {"firstname": "M.C.", "lastname": "Quotes missing"},
         ],
-    }
-    path = tmpdir.join("goodfile")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    assert config_out == config.validate()
-
-
-def test_missing_config():
-    with raises(ConfigError) as excinfo:
-        Configurator(None)
-    assert "must be a non-null string" in str(excinfo.value)
-
-
-def test_empty_config(tmpdir):
-    path = tmpdir.join("emptyfile")
-    path.write("")
-    config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "expected a dictionary" in str(excinfo.value)
-
-
-def test_bad_yaml_format():
-    config = Configurator("/etc/passwd")
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "expected a dictionary" in str(
-        excinfo.value
-    ) or "No such file" in str(excinfo.value)
-
-
-def test_extraneous_spaces(tmpdir):
-    # Good YAML content with spaces before and after values.
-    config_in = """
-    catalog-url:      https://catalog.library.loudoun.gov/
-    media-type: Book
-    authors:
-        - firstname:     Sue
-          lastname:   Grafton
-          media-type:    eBook
-
-        - firstname:                  Stephen
-          lastname:     King
-    """
-    # Expected output:  the same YAML content but in a Python dictionary.
-    config_out = {
+    },
+    "optional_media_type": {
         "catalog-url": "https://catalog.library.loudoun.gov/",
-        "media-type": "Book",
         "authors": [
-            {"firstname": "Sue", "lastname": "Grafton", "media-type": "eBook"},
+            {"firstname": "Sue", "lastname": "Grafton"},
             {"firstname": "Stephen", "lastname": "King"},
         ],
-    }
-    path = tmpdir.join("extraneous spaces")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    assert config_out == config.validate()
-    assert config_out["authors"][0]["firstname"] == "Sue"
-
-
-def test_quoted_text(tmpdir):
-    # Put the full name into the 'lastname' field and use a space for
-    # the 'firstname' field.  The space in the firstname is actually kept
-    # and not stripped; if a space is not used the schema will complain
-    # as the minimum length for the field is 1.  I'm not sure why the space
-    # isn't stripped.  The quoted lastname is fine.
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    media-type: Book
-    authors:
-        - firstname: ' '
-          lastname: 'Sue Grafton'
-
-        - firstname: M.C.
-          lastname: Quotes missing
+    },
+}
+
+# Names of invalid config files in the fixtures directory and text expected
+# in the error message.
+CASES_ERR = {
+    "bad_url": "catalog-url",
+    "url_no_http": "catalog-url",
+    "missing_url": "catalog-url",
+    "bad_media_type": "media-type",
+    "bad_author_media_type": "media-type",
+    "missing_author_lastname": "lastname",
+    "missing_author_firstname": "firstname",
+    "author_tag_but_no_value": "author",
+    "no_authors": "authors",
+}
+
+
+@fixture(scope="session")
+def corpus():
+    """Return the contents of the config files in the fixtures directory.
+
+    The contents are keyed by file name, less the .yaml suffix.
     """
-    # Expected output:  the same YAML content but in a Python dictionary.
-    config_out = {
-        "catalog-url": "https://catalog.library.loudoun.gov/",
-        "media-type": "Book",
-        "authors": [
-            {"firstname": " ", "lastname": "Sue Grafton"},
-            {"firstname": "M.C.", "lastname": "Quotes missing"},
-        ],
-    }
-    path = tmpdir.join("quoted_text")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    assert config_out == config.validate()
-
+    return {path.stem: path.read_text() for path in FIXTURES.glob("*.yaml")}
 
-def test_bad_url(tmpdir):
-    # YAML content with bad URL
-    config_in = """
-    catalog-url: testing
-    media-type: Book
-    authors:
-        - firstname: Sue
-          lastname: Grafton
-          media-type: eBook
-
-        - firstname: Stephen
-          lastname: King
-    """
-    path = tmpdir.join("bad_url")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "catalog-url" in str(excinfo.value)
 
+@mark.parametrize("name,config_out", CASES_OK.items(), ids=list(CASES_OK))
+def test_good_config(corpus, name, config_out):
+    config = Configurator.from_string(corpus[name])
+    assert config_out == config.validate()
 
-def test_url_no_http(tmpdir):
-    # YAML content with URL that has no
-    config_in = """
-    catalog-url: 'catalog.library.loudoun.gov'
-    media-type: Book
-    authors:
-        - firstname: Sue
-          lastname: Grafton
-          media-type: eBook
 
-        - firstname: Stephen
-          lastname: King
-    """
-    path = tmpdir.join("no_http")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
+@mark.parametrize("name,error_text", CASES_ERR.items(), ids=list(CASES_ERR))
+def test_bad_config(corpus, name, error_text):
+    config = Configurator.from_string(corpus[name])
+    with raises(ConfigError, match=error_text):
         config.validate()
-    assert "catalog-url" in str(excinfo.value)
 
 
-def test_missing_url(tmpdir):
-    config_in = """
-    media-type: Book
-    authors:
-        - firstname: Sue
-          lastname: Grafton
-          media-type: eBook
+def test_cached_text(corpus):
+    # The same text is only validated once, but each caller gets its own
+    # copy of the contents.
+    first = Configurator.from_string(corpus["good_config"]).validate()
+    first["authors"].clear()
+    second = Configurator.from_string(corpus["good_config"]).validate()
+    assert CASES_OK["good_config"] == second
 
-        - firstname: Stephen
-          lastname: King
-    """
-    path = tmpdir.join("missing_url")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "catalog-url" in str(excinfo.value)
 
+def test_good_config_file():
+    config = Configurator(str(FIXTURES / "good_config.yaml"))
+    assert CASES_OK["good_config"] == config.validate()
 
-def test_bad_media_type(tmpdir):
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    media-type: nonsense
-    authors:
-        - firstname: Sue
-          lastname: Grafton
-          media-type: eBook
 
-        - firstname: Stephen
-          lastname: King
-    """
-    path = tmpdir.join("bad_media_type")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "media-type" in str(excinfo.value)
+def test_missing_config():
+    with raises(ConfigError, match="must be a non-null string"):
+        Configurator(None)
 
 
-def test_bad_author_media_type(tmpdir):
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    media-type: Book
-    authors:
-        - firstname: Sue
-          lastname: Grafton
-          media-type: nonsense
+def test_config_string_not_str():
+    with raises(ConfigError, match="must be a string"):
+        Configurator.from_string(None)
 
-        - firstname: Stephen
-          lastname: King
-    """
-    path = tmpdir.join("bad_author_media_type")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "media-type" in str(excinfo.value)
 
+def test_empty_config():
+    config = Configurator.from_string("")
+    with raises(ConfigError, match="expected a dictionary"):
+        config.validate()
 
-def test_optional_media_type(tmpdir):
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    authors:
-        - firstname: Sue
-          lastname: Grafton
 
-        - firstname: Stephen
-          lastname: King
-    """
-    config_out = {
-        "catalog-url": "https://catalog.library.loudoun.gov/",
-        "authors": [
-            {"firstname": "Sue", "lastname": "Grafton"},
-            {"firstname": "Stephen", "lastname": "King"},
-        ],
-    }
-    path = tmpdir.join("optional_media_type")
-    path.write(dedent(config_in))
+def test_bad_yaml_format(tmp_path):
+    path = tmp_path / "bad"
+    path.write_bytes(b"this is not a mapping\n")
     config = Configurator(str(path))
-    assert config_out == config.validate()
+    with raises(ConfigError, match="expected a dictionary"):
+        config.validate()
 
 
-def test_media_type_transformation(tmpdir):
+@mark.parametrize(
+    "media_type", Configurator.MEDIA_TYPES, ids=lambda m: m["configName"]
+)
+def test_media_type_transformation(media_type):
     # This test also verifies all the allowed media types.
-    config_out = {
-        "catalog-url": "https://catalog.library.loudoun.gov/",
-        "media-type": "Book",
-        "authors": [{"firstname": "Sue", "lastname": "Grafton"}],
-    }
-    for media_type in Configurator.MEDIA_TYPES:
-        path = tmpdir.join("media_xforms_" + media_type["configName"])
-        path.write(
-            dedent(
-                f"""
-            catalog-url: https://catalog.library.loudoun.gov/
-            media-type: {media_type['configName']}
-            authors:
-                - firstname: Sue
-                  lastname: Grafton
-            """
-            )
-        )
-        config = Configurator(str(path))
-        config_out["media-type"] = media_type["FacetName"]
-        assert config_out == config.validate()
-
-
-def test_missing_author_lastname(tmpdir):
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    media-type: Book
-    authors:
-        - firstname: Sue
-
-        - firstname: Stephen
-          lastname: King
-    """
-    path = tmpdir.join("no_lastname")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "lastname" in str(excinfo.value)
-
+    config_out = {**MEDIA_CONFIG, "media-type": media_type["FacetName"]}
+    config = Configurator.from_string(
+        MEDIA_TEMPLATE.format(media=media_type["configName"])
+    )
+    assert config_out == config.validate()
 
-def test_missing_author_firstname(tmpdir):
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    media-type: Book
-    authors:
-        - lastname: Grafton
-          media-type: eBook
 
-        - firstname: Stephen
-          lastname: King
-    """
-    path = tmpdir.join("no_firstname")
-    path.write(dedent(config_in))
+def test_changed_config(tmp_path):
+    config_in = b"""
+catalog-url: https://catalog.library.loudoun.gov/
+authors:
+    - firstname: Sue
+      lastname: Grafton
+"""
+    path = tmp_path / "changed_config"
+    path.write_bytes(config_in)
     config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "firstname" in str(excinfo.value)
-
-
-def test_author_tag_but_no_value(tmpdir):
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    media-type: Book
-    authors:
-        -
-    """
-    path = tmpdir.join("authors_no_tag")
-    path.write(dedent(config_in))
+    assert "media-type" not in config.validate()
+
+    # The cached contents must not be used once the file changes.
+    path.write_bytes(config_in + b"media-type: ebook\n")
+    assert config.validate()["media-type"] == "eBook"
+    assert config.reload()["media-type"] == "eBook"
+
+
+def test_config_shared_by_instances(tmp_path):
+    path = tmp_path / "shared_config"
+    path.write_bytes(
+        b"catalog-url: https://catalog.library.loudoun.gov/\n"
+        b"authors:\n"
+        b"    - firstname: Sue\n"
+        b"      lastname: Grafton\n"
+    )
+    _load_validated.cache_clear()
+    configs = [Configurator(str(path)).validate() for _ in range(3)]
+    assert configs[0] == configs[1] == configs[2]
+    # pylint: disable-next=no-value-for-parameter
+    cache_info = _load_validated.cache_info()
+    assert (cache_info.hits, cache_info.misses) == (2, 1)
+
+
+def test_cached_config(tmp_path, config_cache_home, caplog):
+    caplog.set_level(logging.DEBUG)
+    path = tmp_path / "cached_config"
+    path.write_bytes(
+        b"catalog-url: https://catalog.library.loudoun.gov/\n"
+        b"authors:\n"
+        b"    - firstname: Sue\n"
+        b"      lastname: Grafton\n"
+    )
+    config_out = Configurator(str(path)).validate()
+    assert (config_cache_home / "booklist" / "config.json").exists()
+    assert "read from cache" not in caplog.text
+
+    # Once the in-memory cache is gone, the contents come from disk.
+    _load_validated.cache_clear()
+    assert Configurator(str(path)).validate() == config_out
+    assert "read from cache" in caplog.text
+
+    # Reloading discards the disk cache too.
+    caplog.clear()
+    assert Configurator(str(path)).reload() == config_out
+    assert "read from cache" not in caplog.text
+
+
+def test_no_cache_home(tmp_path, monkeypatch, caplog):
+    # Without XDG_CACHE_HOME or a home directory, the cache isn't used.
+    def no_home():
+        raise RuntimeError("Could not determine home directory.")
+
+    caplog.set_level(logging.DEBUG)
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    monkeypatch.setattr(Path, "home", no_home)
+    path = tmp_path / "config"
+    path.write_bytes(
+        b"catalog-url: https://catalog.library.loudoun.gov/\n"
+        b"authors:\n"
+        b"    - firstname: Sue\n"
+        b"      lastname: Grafton\n"
+    )
     config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "author" in str(excinfo.value)
+    assert config.validate()["authors"]
+    assert "Config cache not read" in caplog.text
+    assert "Config cache not written" in caplog.text
+    assert config.reload()["authors"]
+
+
+def test_cached_config_non_utf8_path(tmp_path, caplog):
+    caplog.set_level(logging.DEBUG)
+    path = os.fsdecode(os.path.join(os.fsencode(tmp_path), b"caf\xe9.yaml"))
+    Path(path).write_bytes(
+        b"catalog-url: https://catalog.library.loudoun.gov/\n"
+        b"authors:\n"
+        b"    - firstname: Sue\n"
+        b"      lastname: Grafton\n"
+    )
+    config_out = Configurator(path).validate()
+
+    _load_validated.cache_clear()
+    assert Configurator(path).validate() == config_out
+    assert "read from cache" in caplog.text
+
+
+@mark.parametrize("cached", [b"not json", b"5", b"[1, 2, 3]"])
+def test_corrupt_cached_config(tmp_path, config_cache_home, caplog, cached):
+    caplog.set_level(logging.DEBUG)
+    (config_cache_home / "booklist").mkdir(parents=True)
+    (config_cache_home / "booklist" / "config.json").write_bytes(cached)
+    path = tmp_path / "cached_config"
+    path.write_bytes(
+        b"catalog-url: https://catalog.library.loudoun.gov/\n"
+        b"authors:\n"
+        b"    - firstname: Sue\n"
+        b"      lastname: Grafton\n"
+    )
+    # A corrupt cache is ignored and replaced.
+    assert Configurator(str(path)).validate()["authors"]
+    assert "Config cache not read" in caplog.text
+    assert "read from cache" not in caplog.text
+
+
+def test_json_config():
+    config = Configurator.from_string(
+        '{"catalog-url": "https://catalog.library.loudoun.gov/",'
+        ' "authors": [{"firstname": "Sue", "lastname": "Grafton",'
+        ' "media-type": "ebook"}]}'
+    )
+    assert config.validate() == {
+        "catalog-url": "https://catalog.library.loudoun.gov/",
+        "authors": [
+            {"firstname": "Sue", "lastname": "Grafton", "media-type": "eBook"}
+        ],
+    }
 
 
-def test_no_authors(tmpdir):
-    config_in = """
-    catalog-url: https://catalog.library.loudoun.gov/
-    media-type: Book
-    authors:
-    """
-    path = tmpdir.join("no_authors")
-    path.write(dedent(config_in))
-    config = Configurator(str(path))
-    with raises(ConfigError) as excinfo:
-        config.validate()
-    assert "authors" in str(excinfo.value)
+def test_yaml_flow_config():
+    # Looks like JSON, but it's a YAML flow mapping.
+    config = Configurator.from_string(
+        "{catalog-url: https://catalog.library.loudoun.gov/,"
+        " authors: [{firstname: Sue, lastname: Grafton}]}"
+    )
+    assert config.validate()["authors"] == [
+        {"firstname": "Sue", "lastname": "Grafton"}
+    ]